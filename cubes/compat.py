@@ -24,6 +24,12 @@ if py3k:
     from queue import Queue
     from functools import reduce
 
+    def intern(s):
+        # Subclasses of str can not be interned
+        if type(s) is str:
+            return sys.intern(s)
+        return s
+
     def to_unicode(s):
         return str(s)
 
@@ -33,6 +39,9 @@ if py3k:
     def open_unicode(filename):
         return open(filename, encoding="utf-8")
 
+    def move_to_end(ordered_dict, key):
+        ordered_dict.move_to_end(key)
+
 else:
     string_type = basestring
     binary_type = str
@@ -49,6 +58,15 @@ else:
     from Queue import Queue
     reduce = reduce
 
+    import __builtin__
+
+    def intern(s):
+        # Only byte strings, not their subclasses, can be interned in
+        # Python 2
+        if type(s) is str:
+            return __builtin__.intern(s)
+        return s
+
     def to_str(b):
         return b
 
@@ -67,3 +85,7 @@ else:
 
     def open_unicode(filename):
         return open(filename)
+
+    def move_to_end(ordered_dict, key):
+        # OrderedDict.move_to_end() is not available in Python 2
+        ordered_dict[key] = ordered_dict.pop(key)
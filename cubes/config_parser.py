@@ -2,10 +2,19 @@
 
 """Contains the parser of the slicer configuration."""
 
+import re
+
+from collections import OrderedDict
+
 from . import compat
 from .errors import ConfigurationError
 
 
+_COMMENT_PREFIXES = ("#", ";")
+_SECTION = re.compile(r'^\[([^\]]+)\]\s*([#;].*)?$')
+_KV = re.compile(r'^([^=:#;\s][^=:]*?)[ \t]*[=:][ \t]*(.*?)\s*$')
+
+
 def read_slicer_config(config):
     """Read the slicer configuration.
 
@@ -29,3 +38,66 @@ def read_slicer_config(config):
                                  " but is %r" % (type(config),)
                                  )
     return config
+
+
+def parse_ini_sections(text):
+    """Parse the INI formatted `text` and return an ordered dictionary of
+    sections where values are dictionaries of the section options.
+
+    This is a lightweight alternative to the `ConfigParser` for simple
+    files such as ``stores.ini``. Option names are lower-cased and the
+    ``[DEFAULT]`` section is merged into all other sections and ``%%`` in
+    values is read as ``%``, as with the `ConfigParser`. Value interpolation
+    is not supported.
+
+    Raises `ConfigurationError` for lines that are not understood, such as
+    indented continuation lines or options outside of a section, for
+    duplicate sections and options and for any other use of ``%`` in
+    values.
+    """
+    sections = OrderedDict()
+    section = None
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(_COMMENT_PREFIXES):
+            continue
+
+        match = _SECTION.match(line)
+        if match:
+            name = match.group(1).strip()
+            if name in sections:
+                raise ConfigurationError("Duplicate section '%s' (line %d)"
+                                         % (name, lineno))
+            section = sections[name] = {}
+            continue
+
+        match = _KV.match(line)
+        if not match:
+            raise ConfigurationError("Unsupported configuration line %d: %r"
+                                     % (lineno, line))
+        if section is None:
+            raise ConfigurationError("Option outside of a section (line %d)"
+                                     % lineno)
+
+        key = match.group(1).strip().lower()
+        if key in section:
+            raise ConfigurationError("Duplicate option '%s' (line %d)"
+                                     % (key, lineno))
+        value = match.group(2)
+        if "%" in value:
+            if "%" in value.replace("%%", ""):
+                raise ConfigurationError("Value interpolation is not "
+                                         "supported (line %d), write %% "
+                                         "as %%%%" % lineno)
+            value = value.replace("%%", "%")
+        section[key] = value
+
+    defaults = sections.pop("DEFAULT", None)
+    if defaults:
+        for name, section in sections.items():
+            options = dict(defaults)
+            options.update(section)
+            sections[name] = options
+
+    return sections
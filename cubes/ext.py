@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from collections import OrderedDict
 from textwrap import dedent
-from pkg_resources import iter_entry_points
 
 from .common import decamelize, coalesce_options
 from .errors import ArgumentError, InternalError, BackendError
@@ -173,15 +172,24 @@ class ExtensionFinder(object):
         self.type_ = type_
         self.group = "cubes.{}".format(type_)
         self.extensions = {}
+        # Set after all the entry points were discovered
+        self.discovered = False
 
         self.builtins = _BUILTIN_EXTENSIONS.get(self.type_, {})
 
     def discover(self, name=None):
         """Find all entry points."""
+        # pkg_resources is slow to import and it is needed only for
+        # extensions that are not built-in
+        from pkg_resources import iter_entry_points
+
         for obj in iter_entry_points(group=self.group, name=name):
             ext = _Extension(self.type_, obj)
             self.extensions[ext.name] = ext
 
+        if name is None:
+            self.discovered = True
+
     def builtin(self, name):
         try:
             ext_mod = self.builtins[name]
@@ -198,7 +206,7 @@ class ExtensionFinder(object):
 
     def names(self):
         """Return list of extension names."""
-        if not self.extensions:
+        if not self.discovered:
             self.discover()
 
         names = list(self.builtins.keys())
@@ -214,7 +222,10 @@ class ExtensionFinder(object):
             ext = self.builtin(name)
 
         if not ext:
-            self.discover()
+            # Scan the entry points only once – the extension would be
+            # already known otherwise
+            if not self.discovered:
+                self.discover()
 
             try:
                 ext = self.extensions[name]
@@ -246,9 +257,8 @@ class ExtensionFinder(object):
         return ext.create(*args, **kwargs)
 
     def register(self, _ext_name, factory):
-        ext = _Extension(self.type_, name=_ext_name)
-        ext.factory = factory
-        self.extensions["name"] = ext
+        ext = _Extension(self.type_, name=_ext_name, factory=factory)
+        self.extensions[_ext_name] = ext
 
         return ext
 
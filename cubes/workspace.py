@@ -2,15 +2,21 @@
 
 from __future__ import absolute_import
 
-import os.path
+import os
 
 from collections import OrderedDict, defaultdict
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+
 from .metadata import read_model_metadata, find_dimension
 from .metadata import LocalizationContext
 from .auth import NotAuthorized
 from .common import read_json_file
-from .config_parser import read_slicer_config
+from .config_parser import read_slicer_config, parse_ini_sections
 from .errors import ConfigurationError, ArgumentError, CubesError
 from .logging import get_logger
 from .calendar import Calendar
@@ -37,6 +43,25 @@ SLICER_INFO_KEYS = (
     "related"       # List of dicts with related servers
 )
 
+# Prefixes of configuration sections with additional stores and with model
+# translations
+_STORE_PREFIX = "store_"
+_LOCALE_PREFIX = "locale "
+
+# Other configuration sections read by the workspace. The configuration file
+# is shared with the server and other tools, their sections are not touched.
+_WORKSPACE_SECTIONS = ("store", "browser", "main", "info", "authorization",
+                       "model", "models")
+
+# Configured models are read in parallel by default when there are at least
+# this many of them
+PARALLEL_MODEL_LOAD_THRESHOLD = 4
+MAX_MODEL_LOAD_WORKERS = 8
+
+# Maximum number of cubes cached by the workspace, see `Workspace.cube()`
+DEFAULT_CUBE_CACHE_SIZE = 256
+
+
 def interpret_config_value(value):
     if value is None:
         return value
@@ -53,6 +78,30 @@ def config_items_to_dict(items):
 
 
 class Workspace(object):
+    __slots__ = (
+        "store_infos",
+        "stores",
+        "logger",
+        "root_dir",
+        "models_dir",
+        "namespace",
+        "calendar",
+        "_info",
+        "_info_path",
+        "_browser_options",
+        "options",
+        "_authorizer",
+        "ns_languages",
+        "_cubes",
+        "_cubes_maxsize",
+        "_l10n_context_cache",
+        "_store_base_options",
+        "_all_cubes_cache",
+        "_auth_cache",
+        "_find_cube_cache",
+        "_namespace_cache",
+    )
+
     def __init__(self, config=None, stores=None, load_base_model=True,
                  **_options):
         """Creates a workspace. `config` should be a `ConfigParser` or a
@@ -80,6 +129,16 @@ class Workspace(object):
 
         config = read_slicer_config(config)
 
+        # Read the workspace configuration sections once – further lookups
+        # are plain dictionary lookups instead of going through the
+        # ConfigParser. Sections of other tools are not read, their values
+        # might not be valid for interpolation.
+        section_names = [name for name in config.sections()
+                         if name in _WORKSPACE_SECTIONS
+                         or name.startswith((_STORE_PREFIX, _LOCALE_PREFIX))]
+        sections = OrderedDict((name, dict(config.items(name)))
+                               for name in section_names)
+
         self.store_infos = {}
         self.stores = {}
 
@@ -126,14 +185,45 @@ class Workspace(object):
 
         self.namespace = Namespace()
 
-        # Cache of created global objects
-        self._cubes = {}
+        # Cache of created global objects – least recently used cubes are
+        # discarded when the cache is full
+        if config.has_option("workspace", "cube_cache_size"):
+            try:
+                maxsize = config.getint("workspace", "cube_cache_size")
+            except ValueError:
+                maxsize = None
+
+            if maxsize is None or maxsize < 0:
+                raise ConfigurationError("cube_cache_size should be a "
+                                         "non-negative integer, is '%s'"
+                                         % config.get("workspace",
+                                                      "cube_cache_size"))
+            self._cubes_maxsize = maxsize
+        else:
+            self._cubes_maxsize = DEFAULT_CUBE_CACHE_SIZE
+        self._cubes = OrderedDict()
+        # (namespace, locale) -> localization context
+        self._l10n_context_cache = {}
+        # Store options merged with the workspace browser options, keyed by
+        # the store object and the store name if the options come from the
+        # store configuration
+        self._store_base_options = {}
+        # Caches of namespace lookups, see `_flush_namespace_cache()`:
+        # list of all cubes and names of authorized cubes per identity
+        self._all_cubes_cache = None
+        self._auth_cache = OrderedDict()
+        # cube reference -> (namespace, provider, basename)
+        self._find_cube_cache = {}
+        # namespace reference -> namespace
+        self._namespace_cache = {}
         # Note: providers are responsible for their own caching
 
         # Info
         # ====
 
-        self.info = OrderedDict()
+        # The info file is read on first access of `info`
+        self._info = OrderedDict()
+        self._info_path = None
 
         if config.has_option("workspace", "info_file"):
             path = config.get("workspace", "info_file")
@@ -141,20 +231,19 @@ class Workspace(object):
             if self.root_dir and not os.path.isabs(path):
                 path = os.path.join(self.root_dir, path)
 
-            info = read_json_file(path, "Slicer info")
-            for key in SLICER_INFO_KEYS:
-                self.info[key] = info.get(key)
+            self._info = None
+            self._info_path = path
 
-        elif config.has_section("info"):
-            info = dict(config.items("info"))
+        elif "info" in sections:
+            info = dict(sections["info"])
             if "visualizer" in info:
                 info["visualizers"] = [{
                     "label": info.get("label", info.get("name", "Default")),
                     "url": info["visualizer"]
                 }]
 
-            for key in SLICER_INFO_KEYS:
-                self.info[key] = info.get(key)
+            self._info = OrderedDict((key, info.get(key))
+                                     for key in SLICER_INFO_KEYS)
 
         # Register stores from external stores.ini file or a dictionary
         if not stores and config.has_option("workspace", "stores_file"):
@@ -165,20 +254,29 @@ class Workspace(object):
                 stores = os.path.join(self.root_dir, stores)
 
         if isinstance(stores, compat.string_type):
-            store_config = ConfigParser()
             try:
-                store_config.read(stores)
+                if os.environ.get("CUBES_FAST_INI", "1") != "0":
+                    with compat.open_unicode(stores) as f:
+                        store_sections = parse_ini_sections(f.read())
+                else:
+                    store_config = ConfigParser()
+                    # Fail on a missing file the same way as above
+                    if not store_config.read(stores):
+                        raise IOError("File does not exist or can not be "
+                                      "read")
+                    store_sections = OrderedDict(
+                        (store, dict(store_config.items(store)))
+                        for store in store_config.sections())
             except Exception as e:
                 raise ConfigurationError("Unable to read stores from %s. "
                                          "Reason: %s" % (stores, str(e) ))
 
-            for store in store_config.sections():
-                self._register_store_dict(store,
-                                          dict(store_config.items(store)))
+            for store, info in store_sections.items():
+                self._register_store_dict(store, info)
 
         elif isinstance(stores, dict):
             for name, store in stores.items():
-                self._register_store_dict(name, store)
+                self._register_store_dict(name, dict(store))
 
         elif stores is not None:
             raise ConfigurationError("Unknown stores description object: %s" %
@@ -202,59 +300,52 @@ class Workspace(object):
         self.calendar = Calendar(timezone=timezone,
                                  first_weekday=first_weekday)
 
-        # Register Stores
-        # ===============
+        # Register Stores and Languages
+        # =============================
         #
         # * Default store is [store] in main config file
         # * Stores are also loaded from main config file from sections with
         #   name [store_*] (not documented feature)
+        # * Model translations are in sections [locale *]
+        #
+        # The sections are sorted into groups in one pass over the section
+        # names, the groups are then handled in order.
 
-        default = None
-        if config.has_section("store"):
-            default = dict(config.items("store"))
+        self.browser_options = dict(sections.get("browser", {}))
+        self.options = dict(sections.get("main", {}))
 
-        if default:
-            self._register_store_dict("default", default)
+        store_sections = []
+        locale_sections = []
 
-        # Register [store_*] from main config (not documented)
-        for section in config.sections():
-            if section != "store" and section.startswith("store"):
-                name = section[6:]
-                self._register_store_dict(name, dict(config.items(section)))
+        for section in section_names:
+            if section.startswith(_STORE_PREFIX):
+                store_sections.append(section)
+            elif section.startswith(_LOCALE_PREFIX):
+                locale_sections.append(section)
 
-        if config.has_section("browser"):
-            self.browser_options = dict(config.items("browser"))
-        else:
-            self.browser_options = {}
+        default = sections.get("store")
 
-        if config.has_section("main"):
-            self.options = dict(config.items("main"))
-        else:
-            self.options = {}
+        if default:
+            self._register_store_dict("default", default)
 
-        # Register Languages
-        # ==================
-        #
+        for section in store_sections:
+            name = section[len(_STORE_PREFIX):]
+            self._register_store_dict(name, sections[section])
 
-        # Register [language *]
         self.ns_languages = defaultdict(dict)
-        for section in config.sections():
-            if section.startswith("locale"):
-                lang = section[9:]
-                # namespace -> path
-                for nsname, path in config.items(section):
-                    if nsname == "defalt":
-                        ns = self.namespace
-                    else:
-                        (ns, _) = self.namespace.namespace(nsname)
-                    ns.add_translation(lang, path)
+        for section in locale_sections:
+            lang = section[len(_LOCALE_PREFIX):].strip()
+            # namespace -> path
+            for nsname, path in sections[section].items():
+                ns = self._get_namespace(nsname)
+                ns.add_translation(lang, path)
 
         # Authorizer
         # ==========
 
         if config.has_option("workspace", "authorization"):
             auth_type = config.get("workspace", "authorization")
-            options = dict(config.items("authorization"))
+            options = dict(sections.get("authorization", {}))
             options["cubes_root"] = self.root_dir
             self.authorizer = ext.authorizer(auth_type, **options)
         else:
@@ -272,31 +363,121 @@ class Workspace(object):
         # models/*.cubesmodel
         models = []
         # Undepreciated
-        if config.has_section("model"):
-            if not config.has_option("model", "path"):
+        if "model" in sections:
+            if "path" not in sections["model"]:
                 raise ConfigurationError("No model path specified")
 
-            path = config.get("model", "path")
+            path = sections["model"]["path"]
             models.append(("main", path))
 
         # TODO: Depreciate this too
-        if config.has_section("models"):
-            models += config.items("models")
+        if "models" in sections:
+            models += sections["models"].items()
 
-        for model, path in models:
-            self.logger.debug("Loading model %s" % model)
-            self.import_model(path)
+        # Model files are read in parallel, the models are registered
+        # sequentially afterwards
+        if config.has_option("workspace", "parallel_model_load"):
+            try:
+                parallel = config.getboolean("workspace",
+                                             "parallel_model_load")
+            except ValueError:
+                raise ConfigurationError("parallel_model_load should be a "
+                                         "boolean, is '%s'"
+                                         % config.get("workspace",
+                                                      "parallel_model_load"))
+        else:
+            parallel = len(models) >= PARALLEL_MODEL_LOAD_THRESHOLD
+
+        paths = [path for (_, path) in models]
+
+        if parallel and ThreadPoolExecutor and len(models) > 1:
+            workers = min(MAX_MODEL_LOAD_WORKERS, len(models))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                metadatas = list(executor.map(self._read_model_metadata,
+                                              paths))
+        else:
+            metadatas = [self._read_model_metadata(path) for path in paths]
+
+        for (model, path), metadata in zip(models, metadatas):
+            self.logger.debug("Loading model %s from %s" % (model, path))
+            self.import_model(metadata)
+
+    def _read_model_metadata(self, path):
+        """Reads model metadata from `path`. Relative paths are relative to
+        the models directory."""
+
+        if self.models_dir and not os.path.isabs(path):
+            path = os.path.join(self.models_dir, path)
+
+        return read_model_metadata(path)
+
+    @property
+    def authorizer(self):
+        """Authorizer of cubes for user identities or `None`."""
+        return self._authorizer
+
+    @authorizer.setter
+    def authorizer(self, authorizer):
+        self._authorizer = authorizer
+        # Cached authorization was done by the previous authorizer
+        self._auth_cache.clear()
+
+    @property
+    def browser_options(self):
+        """Workspace browser options from the ``[browser]`` section. They
+        override the store options and are overriden by the cube's
+        `browser_options`. Options are merged with the store options once
+        per store – assigning new options resets the merged options, but
+        after modifying the dictionary or the store options in place
+        :meth:`flush_lookup_cache` has to be called."""
+        return self._browser_options
+
+    @browser_options.setter
+    def browser_options(self, options):
+        self._browser_options = options
+        self._store_base_options.clear()
+
+    @property
+    def info(self):
+        """Info dictionary from the info file or info section. The info
+        file is read on the first access."""
+        if self._info is None:
+            info = read_json_file(self._info_path, "Slicer info")
+            self._info = OrderedDict((key, info.get(key))
+                                     for key in SLICER_INFO_KEYS)
+        return self._info
+
+    @info.setter
+    def info(self, info):
+        self._info = info
 
     def flush_lookup_cache(self):
         """Flushes the cube lookup cache."""
         self._cubes.clear()
+        self._l10n_context_cache.clear()
+        self._store_base_options.clear()
+        self._flush_namespace_cache()
         # TODO: flush also dimensions
 
+    def _flush_namespace_cache(self):
+        """Flushes caches of lookups in the namespace hierarchy. Has to be
+        called whenever a namespace or a provider is added."""
+        self._all_cubes_cache = None
+        self._auth_cache.clear()
+        self._find_cube_cache.clear()
+        self._namespace_cache.clear()
+
     def _get_namespace(self, ref):
         """Returns namespace with ference `ref`"""
         if not ref or ref == "default":
             return self.namespace
-        return self.namespace.namespace(ref)[0]
+
+        try:
+            return self._namespace_cache[ref]
+        except KeyError:
+            namespace = self.namespace.namespace(ref)[0]
+            self._namespace_cache[ref] = namespace
+            return namespace
 
     def add_translation(self, locale, trans, ns="default"):
         """Add translation `trans` for `locale`. `ns` is a namespace. If no
@@ -304,9 +485,11 @@ class Workspace(object):
 
         namespace = self._get_namespace(ns)
         namespace.add_translation(locale, trans)
+        self._l10n_context_cache.clear()
 
     def _register_store_dict(self, name, info):
-        info = dict(info)
+        """Registers store `name` described by `info` dictionary. The `info`
+        is modified – callers should pass their own copy."""
         try:
             type_ = info.pop("type")
         except KeyError:
@@ -328,8 +511,6 @@ class Workspace(object):
     def register_store(self, name, type_, include_model=True, **config):
         """Adds a store configuration."""
 
-        config = dict(config)
-
         if name in self.store_infos:
             raise ConfigurationError("Store %s already registered" % name)
 
@@ -347,11 +528,7 @@ class Workspace(object):
         # Get related model provider or override it with configuration
         store_factory = ext.store.factory(type_)
 
-        if hasattr(store_factory, "related_model_provider"):
-            provider = store_factory.related_model_provider
-        else:
-            provider = None
-
+        provider = getattr(store_factory, "related_model_provider", None)
         provider = config.pop("model_provider", provider)
 
         nsname = config.pop("namespace", None)
@@ -420,10 +597,7 @@ class Workspace(object):
             self.logger.debug("Importing model from %s. "
                               "Provider: %s Store: %s NS: %s"
                               % (model, provider, store, namespace))
-            path = model
-            if self.models_dir and not os.path.isabs(path):
-                path = os.path.join(self.models_dir, path)
-            model = read_model_metadata(path)
+            model = self._read_model_metadata(model)
         elif isinstance(model, dict):
             self.logger.debug("Importing model from dictionary. "
                               "Provider: %s Store: %s NS: %s"
@@ -474,6 +648,7 @@ class Workspace(object):
             (ns, _) = self.namespace.namespace(store, create=True)
 
         ns.add_provider(provider)
+        self._flush_namespace_cache()
 
     def add_slicer(self, name, url, **options):
         """Register a slicer as a model and data provider."""
@@ -482,30 +657,90 @@ class Workspace(object):
 
     def cube_names(self, identity=None):
         """Return names all available cubes."""
-        return [cube["name"] for cube in self.list_cubes()]
+        return [cube["name"] for cube in self.list_cubes(identity)]
 
     # TODO: this is not loclized!!!
     def list_cubes(self, identity=None):
         """Get a list of metadata for cubes in the workspace. Result is a list
         of dictionaries with keys: `name`, `label`, `category`, `info`.
 
-        The list is fetched from the model providers on the call of this
-        method.
+        The list is fetched from the model providers on the first call of
+        this method and cached until a model is imported or
+        :meth:`flush_lookup_cache` is called.
 
         If the workspace has an authorizer, then it is used to authorize the
         cubes for `identity` and only authorized list of cubes is returned.
+        The authorization is cached per identity, see
+        :meth:`invalidate_auth`.
         """
 
-        all_cubes = self.namespace.list_cubes(recursive=True)
+        if self._all_cubes_cache is None:
+            self._all_cubes_cache = self.namespace.list_cubes(recursive=True)
+
+        all_cubes = self._all_cubes_cache
 
         if self.authorizer:
+            authorized = self._cached_authorization(identity)
+
+            if authorized is None:
+                names = [cube["name"] for cube in all_cubes]
+                names = self.authorizer.authorize(identity, names)
+                authorized = (tuple(names), frozenset(names))
+                self._cache_authorization(identity, authorized)
+
+            # Keep the order of cubes as returned by the authorizer
             by_name = dict((cube["name"], cube) for cube in all_cubes)
-            names = [cube["name"] for cube in all_cubes]
+            all_cubes = [by_name[name] for name in authorized[0]]
+
+        return list(all_cubes)
+
+    def _cached_authorization(self, identity):
+        """Returns a tuple (`names`, `name_set`) of cubes authorized for
+        `identity` by `list_cubes()` or `None` if the authorization is not
+        cached."""
+        try:
+            authorized = self._auth_cache.get(identity)
+        except TypeError:
+            # Unhashable identity, such as a dictionary
+            return None
 
-            authorized = self.authorizer.authorize(identity, names)
-            all_cubes = [by_name[name] for name in authorized]
+        if authorized is not None:
+            try:
+                compat.move_to_end(self._auth_cache, identity)
+            except KeyError:
+                # Evicted by another thread in the meantime
+                pass
 
-        return all_cubes
+        return authorized
+
+    def _cache_authorization(self, identity, authorized):
+        """Caches `authorized` cubes for `identity`. The cache has the same
+        size as the cube cache, least recently used identities are
+        discarded."""
+        try:
+            hash(identity)
+        except TypeError:
+            return
+
+        if self._cubes_maxsize \
+                and len(self._auth_cache) >= self._cubes_maxsize:
+            try:
+                self._auth_cache.popitem(last=False)
+            except KeyError:
+                # Emptied by another thread in the meantime
+                pass
+        self._auth_cache[identity] = authorized
+
+    def invalidate_auth(self, identity=None):
+        """Forgets cached authorization of cubes for `identity`, for example
+        when the user logs out or their rights change. If no `identity` is
+        specified, then authorization of all identities is forgotten. All
+        the authorization is forgotten also when the `authorizer` is
+        replaced."""
+        if identity is None:
+            self._auth_cache.clear()
+        else:
+            self._auth_cache.pop(identity, None)
 
     def cube(self, ref, identity=None, locale=None):
         """Returns a cube with full cube namespace reference `ref` for user
@@ -515,19 +750,42 @@ class Workspace(object):
             raise TypeError("Reference is not a string, is %s" % type(ref))
 
         if self.authorizer:
-            authorized = self.authorizer.authorize(identity, [ref])
-            if not authorized:
+            # Use authorized cubes from list_cubes() if there are any for
+            # the identity, ask the authorizer otherwise
+            authorized = self._cached_authorization(identity)
+            authorized = authorized is not None and ref in authorized[1]
+
+            if not authorized \
+                    and not self.authorizer.authorize(identity, [ref]):
                 raise NotAuthorized
 
         # If we have a cached cube, return it
         # See also: flush lookup
+        #
+        # Interned strings are compared by identity in the dictionary lookup
+        ref = compat.intern(ref)
+        if isinstance(locale, compat.string_type):
+            locale = compat.intern(locale)
+
         cube_key = (ref, identity, locale)
-        if cube_key in self._cubes:
-            return self._cubes[cube_key]
+        cube = self._cubes.get(cube_key)
+        if cube is not None:
+            # Keep the most recently used cube at the end. The cube is not
+            # removed from the cache, so concurrent lookups still find it.
+            try:
+                compat.move_to_end(self._cubes, cube_key)
+            except KeyError:
+                # Evicted by another thread in the meantime
+                pass
+            return cube
 
         # Find the namespace containing the cube – we will need it for linking
         # later
-        (namespace, provider, basename) = self.namespace.find_cube(ref)
+        try:
+            (namespace, provider, basename) = self._find_cube_cache[ref]
+        except KeyError:
+            (namespace, provider, basename) = self.namespace.find_cube(ref)
+            self._find_cube_cache[ref] = (namespace, provider, basename)
 
         cube = provider.cube(basename, locale=locale, namespace=namespace)
         cube.namespace = namespace
@@ -537,19 +795,45 @@ class Workspace(object):
         cube.basename = basename
         cube.name = ref
 
-        lookup = namespace.translation_lookup(locale)
+        context = self._localization_context(namespace, locale)
 
-        if lookup:
-            # TODO: pass lookup instead of jsut first found translation
-            context = LocalizationContext(lookup[0])
+        if context:
             trans = context.object_localization("cubes", cube.name)
             cube = cube.localized(trans)
 
         # Cache the cube
+        if self._cubes_maxsize and len(self._cubes) >= self._cubes_maxsize:
+            try:
+                self._cubes.popitem(last=False)
+            except KeyError:
+                # Emptied by another thread in the meantime
+                pass
         self._cubes[cube_key] = cube
 
         return cube
 
+    def _localization_context(self, namespace, locale):
+        """Returns a localization context for `locale` in `namespace` or
+        `None` if there is no translation for the locale. Only contexts of
+        existing translations are cached, so that arbitrary requested
+        locales do not grow the cache."""
+
+        key = (namespace, locale)
+        try:
+            return self._l10n_context_cache[key]
+        except KeyError:
+            pass
+
+        lookup = namespace.translation_lookup(locale)
+
+        if not lookup:
+            return None
+
+        # TODO: pass lookup instead of jsut first found translation
+        context = LocalizationContext(lookup[0])
+        self._l10n_context_cache[key] = context
+        return context
+
     def dimension(self, name, locale=None, namespace=None, provider=None):
         """Returns a dimension with `name`. Raises `NoSuchDimensionError` when
         no model published the dimension. Raises `RequiresTemplate` error when
@@ -567,17 +851,6 @@ class Workspace(object):
                               namespace or self.namespace,
                               provider)
 
-    def _browser_options(self, cube):
-        """Returns browser configuration options for `cube`. The options are
-        taken from the configuration file and then overriden by cube's
-        `browser_options` attribute."""
-
-        options = dict(self.browser_options)
-        if cube.browser_options:
-            options.update(cube.browser_options)
-
-        return options
-
     def browser(self, cube, locale=None, identity=None):
         """Returns a browser for `cube`."""
 
@@ -592,12 +865,13 @@ class Workspace(object):
         if isinstance(cube.store, compat.string_type):
             store_name = cube.store or "default"
             store = self.get_store(store_name)
-            store_type = self.store_infos[store_name][0]
             store_info = self.store_infos[store_name][1]
         elif cube.store:
+            store_name = None
             store = cube.store
             store_info = store.options or {}
         else:
+            store_name = None
             store = self.get_store("default")
             store_info = store.options or {}
 
@@ -605,18 +879,30 @@ class Workspace(object):
         if not store_type:
             raise CubesError("Store %s has no store_type set" % store)
 
-        cube_options = self._browser_options(cube)
+        # Browser options are store options overriden by the workspace
+        # browser options and then by cube's `browser_options` attribute.
+        # The first two are merged only once per store and the source of its
+        # options (the store configuration or the store object), see
+        # `browser_options`.
+        key = (store, store_name)
+        try:
+            base_options = self._store_base_options[key]
+        except KeyError:
+            base_options = dict(store_info)
+            base_options.update(self.browser_options)
+            self._store_base_options[key] = base_options
 
         # TODO: merge only keys that are relevant to the browser!
-        options = dict(store_info)
-        options.update(cube_options)
+        options = dict(base_options)
+        if cube.browser_options:
+            options.update(cube.browser_options)
 
         # TODO: Construct options for the browser from cube's options
         # dictionary and workspece default configuration
 
         browser_name = cube.browser
-        if not browser_name and hasattr(store, "default_browser_name"):
-            browser_name = store.default_browser_name
+        if not browser_name:
+            browser_name = getattr(store, "default_browser_name", None)
         if not browser_name:
             browser_name = store_type
         if not browser_name:
@@ -0,0 +1,41 @@
+import unittest
+from cubes.ext import ExtensionFinder
+from cubes.errors import InternalError
+
+
+class Factory(object):
+    def __init__(self, value=None):
+        self.value = value
+
+
+class ExtensionFinderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.finder = ExtensionFinder("browsers")
+
+    def test_register(self):
+        self.finder.register("custom", Factory)
+
+        self.assertIs(Factory, self.finder.factory("custom"))
+        self.assertIn("custom", self.finder.names())
+
+        obj = self.finder("custom", value=10)
+        self.assertIsInstance(obj, Factory)
+        self.assertEqual(10, obj.value)
+
+    def test_discover_once(self):
+        calls = []
+        discover = self.finder.discover
+
+        def counting_discover(name=None):
+            calls.append(name)
+            discover(name)
+
+        self.finder.discover = counting_discover
+
+        with self.assertRaises(InternalError):
+            self.finder.get("unknown")
+        self.assertTrue(self.finder.discovered)
+
+        with self.assertRaises(InternalError):
+            self.finder.get("another_unknown")
+        self.assertEqual([None], calls)
@@ -2,16 +2,48 @@ import unittest
 import os
 import json
 import re
+import tempfile
 from cubes.errors import ConfigurationError, NoSuchCubeError, NoSuchDimensionError
 from cubes.errors import NoSuchAttributeError
-from cubes.workspace import Workspace
+from cubes.workspace import Workspace, SLICER_INFO_KEYS
 from cubes.stores import Store
 from cubes.metadata import *
 from cubes.server.base import read_slicer_config
+from cubes.config_parser import parse_ini_sections
+from cubes.compat import ConfigParser
+from cubes.auth import Authorizer, NotAuthorized
+from cubes import ext
 
 from .common import CubesTestCaseBase
 # FIXME: remove this once satisfied
 
+class CountingAuthorizer(Authorizer):
+    """Authorizes only `allowed` cubes and counts the authorizations."""
+    def __init__(self, allowed):
+        super(CountingAuthorizer, self).__init__()
+        self.allowed = allowed
+        self.calls = 0
+
+    def authorize(self, token, cubes):
+        self.calls += 1
+        # Authorized cubes are returned in the order of `allowed`
+        return [cube for cube in self.allowed if cube in cubes]
+
+
+class OptionsBrowser(object):
+    """Browser that only keeps the options it was created with."""
+    def __init__(self, cube, store, locale=None, calendar=None, **options):
+        self.options = options
+
+
+class OptionsStore(Store):
+    """Store that only keeps its options."""
+
+
+ext.browser.register("test_options", OptionsBrowser)
+ext.store.register("test_options", OptionsStore)
+
+
 class WorkspaceTestCaseBase(CubesTestCaseBase):
     def default_workspace(self, model_name=None):
         model_name = model_name or "model.json"
@@ -38,6 +70,177 @@ class WorkspaceModelTestCase(WorkspaceTestCaseBase):
             ):
                 Workspace(config=config)
 
+    def test_config_stores(self):
+        config = read_slicer_config(self.data_path("slicer.ini"))
+        ws = Workspace(config=config)
+
+        self.assertEqual(set(["default", "production"]),
+                         set(ws.store_infos.keys()))
+        (type_, options) = ws.store_infos["production"]
+        self.assertEqual("sql", type_)
+        self.assertEqual("postgres://localhost/data", options["url"])
+
+    def test_config_foreign_sections(self):
+        # Sections of other tools are not interpolated by the workspace
+        config = ConfigParser()
+        config.add_section("workspace")
+        config.add_section("server")
+        config.set("server", "log_format", "%(asctime)s %(message)s")
+        ws = Workspace(config=config)
+
+        self.assertEqual({}, ws.store_infos)
+
+    def test_config_info(self):
+        config = ConfigParser()
+        config.add_section("info")
+        config.set("info", "label", "Test")
+        config.set("info", "visualizer", "http://localhost/viz")
+        ws = Workspace(config=config)
+
+        self.assertEqual("Test", ws.info["label"])
+        self.assertIsNone(ws.info["name"])
+        self.assertEqual([{"label": "Test", "url": "http://localhost/viz"}],
+                         ws.info["visualizers"])
+        self.assertEqual(list(SLICER_INFO_KEYS), list(ws.info))
+
+    def test_config_info_file(self):
+        config = ConfigParser()
+        config.add_section("workspace")
+        config.set("workspace", "info_file", "missing_info.json")
+        # The file is read only when the info is needed
+        ws = Workspace(config=config)
+        with self.assertRaises(ConfigurationError):
+            ws.info
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json",
+                                         delete=False) as f:
+            json.dump({"name": "test", "unknown": "ignored"}, f)
+        try:
+            config.set("workspace", "info_file", f.name)
+            ws = Workspace(config=config)
+            self.assertEqual("test", ws.info["name"])
+        finally:
+            os.remove(f.name)
+
+        self.assertNotIn("unknown", ws.info)
+
+    def test_config_locales(self):
+        config = ConfigParser()
+        config.add_section("locale sk")
+        config.set("locale sk", "default", self.model_path("translation.json"))
+        ws = Workspace(config=config)
+
+        self.assertEqual(["sk"], list(ws.namespace.translations))
+
+        # Only contexts of existing translations are cached
+        self.assertIsNotNone(ws._localization_context(ws.namespace, "sk"))
+        self.assertIsNone(ws._localization_context(ws.namespace, "xx"))
+        self.assertEqual([(ws.namespace, "sk")],
+                         list(ws._l10n_context_cache))
+
+    def test_config_model_bundle(self):
+        config = ConfigParser()
+        config.add_section("workspace")
+        config.set("workspace", "models_directory", self._models_path)
+        config.add_section("model")
+        config.set("model", "path", "test.cubesmodel")
+        ws = Workspace(config=config)
+
+        self.assertEqual(["contracts"], ws.cube_names())
+
+    def test_config_models_parallel(self):
+        config = ConfigParser()
+        config.add_section("workspace")
+        config.set("workspace", "models_directory", self._models_path)
+        config.set("workspace", "parallel_model_load", "yes")
+        config.add_section("models")
+        config.set("models", "main", "model.json")
+        config.set("models", "other", "other.json")
+        ws = Workspace(config=config)
+
+        self.assertEqual(["contracts", "other"], sorted(ws.cube_names()))
+        # Dimension of the other cube comes from the main model
+        ws.cube("other")
+
+        config.set("workspace", "parallel_model_load", "maybe")
+        with self.assertRaises(ConfigurationError):
+            Workspace(config=config)
+
+    def test_stores_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ini",
+                                         delete=False) as f:
+            f.write("[DEFAULT]\n"
+                    "type: sql\n"
+                    "\n"
+                    "; comment\n"
+                    "[default]\n"
+                    "url: sqlite:///\n"
+                    "\n"
+                    "[other]\n"
+                    "URL = sqlite:///other.db\n")
+        try:
+            ws = Workspace(stores=f.name)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(["default", "other"], sorted(ws.store_infos))
+        (type_, options) = ws.store_infos["other"]
+        self.assertEqual("sql", type_)
+        self.assertEqual("sqlite:///other.db", options["url"])
+
+    def test_parse_ini_sections(self):
+        sections = parse_ini_sections("[store]\n"
+                                      "# comment\n"
+                                      "type: sql\n"
+                                      "url =\n"
+                                      "schema: public  \n"
+                                      "[locale sk]\n"
+                                      "default = sk.json\n")
+
+        self.assertEqual(["store", "locale sk"], list(sections))
+        self.assertEqual({"type": "sql", "url": "", "schema": "public"},
+                         sections["store"])
+        self.assertEqual({"default": "sk.json"}, sections["locale sk"])
+
+        sections = parse_ini_sections("[store] ; comment\ntype: sql\n")
+        self.assertEqual({"store": {"type": "sql"}}, sections)
+
+        # Escaped percent sign is read the same way as by the ConfigParser
+        sections = parse_ini_sections("[store]\n"
+                                      "url: postgres://u:p%%40ss@h/db\n")
+        self.assertEqual("postgres://u:p%40ss@h/db", sections["store"]["url"])
+
+    def test_parse_ini_sections_errors(self):
+        invalid = [
+            "[store]\n  url = sqlite:///\n",      # indented option
+            "[store]\nurl =\n  sqlite:///\n",    # continuation line
+            "[store]\nurl\n",                     # no value separator
+            "[store]\ntype: sql\n[store]\n",     # duplicate section
+            "[store]\ntype: sql\ntype: sql\n",   # duplicate option
+            "type: sql\n[store]\n",               # option before header
+            "[store]\nurl: p%40ss\n",             # unescaped percent sign
+            "[store]\nurl: %(host)s\n",           # interpolation
+        ]
+        for text in invalid:
+            with self.assertRaises(ConfigurationError, msg=repr(text)):
+                parse_ini_sections(text)
+
+    def test_missing_stores_file(self):
+        path = self.data_path("missing_stores.ini")
+        with self.assertRaises(ConfigurationError):
+            Workspace(stores=path)
+
+        fast_ini = os.environ.get("CUBES_FAST_INI")
+        os.environ["CUBES_FAST_INI"] = "0"
+        try:
+            with self.assertRaises(ConfigurationError):
+                Workspace(stores=path)
+        finally:
+            if fast_ini is None:
+                del os.environ["CUBES_FAST_INI"]
+            else:
+                os.environ["CUBES_FAST_INI"] = fast_ini
+
     def test_get_cube(self):
         ws = self.default_workspace()
         cube = ws.cube("contracts")
@@ -46,6 +249,60 @@ class WorkspaceModelTestCase(WorkspaceTestCaseBase):
         # self.assertEqual(6, len(cube.dimensions))
         self.assertEqual(1, len(cube.measures))
 
+    def test_get_cube_str_subclass(self):
+        class Name(str):
+            pass
+
+        ws = self.default_workspace()
+        cube = ws.cube(Name("contracts"), locale=Name("en"))
+        self.assertEqual("contracts", cube.name)
+
+    def test_cube_cache_size(self):
+        config = ConfigParser()
+        config.add_section("workspace")
+        config.set("workspace", "cube_cache_size", "2")
+        ws = Workspace(config=config)
+        ws.import_model(self.model_path("model.json"))
+
+        cube = ws.cube("contracts")
+        self.assertIs(cube, ws.cube("contracts"))
+
+        ws.cube("contracts", identity="john")
+        ws.cube("contracts")
+        # Evicts the least recently used cube – the one for john
+        ws.cube("contracts", identity="ivana")
+
+        self.assertEqual(2, len(ws._cubes))
+        self.assertIs(cube, ws.cube("contracts"))
+        self.assertNotIn(("contracts", "john", None), ws._cubes)
+
+        config.set("workspace", "cube_cache_size", "many")
+        with self.assertRaises(ConfigurationError):
+            Workspace(config=config)
+
+        config.set("workspace", "cube_cache_size", "-1")
+        with self.assertRaises(ConfigurationError):
+            Workspace(config=config)
+
+    def test_browser_options(self):
+        ws = Workspace()
+        ws.browser_options = {"workspace_only": "workspace",
+                              "both": "workspace", "all": "workspace"}
+        ws.register_default_store("test_options", store_only="store",
+                                  both="store", all="store")
+        ws.import_model({"cubes": [{"name": "cube", "browser": "test_options",
+                                    "browser_options": {"all": "cube"}}]})
+
+        # store -> workspace [browser] -> cube browser_options
+        options = ws.browser("cube").options
+        self.assertEqual("store", options["store_only"])
+        self.assertEqual("workspace", options["workspace_only"])
+        self.assertEqual("workspace", options["both"])
+        self.assertEqual("cube", options["all"])
+
+        ws.browser_options = {"both": "changed"}
+        self.assertEqual("changed", ws.browser("cube").options["both"])
+
     def test_get_namespace_cube(self):
         ws = Workspace()
         ws.import_model(self.model_path("model.json"), namespace="local")
@@ -72,6 +329,58 @@ class WorkspaceModelTestCase(WorkspaceTestCaseBase):
         # This should pass, since the dimension is in the default namespace
         ws.cube("store2.other")
 
+    def test_list_cubes_cache(self):
+        ws = Workspace()
+        ws.import_model(self.model_path("model.json"))
+        names = ws.cube_names()
+        self.assertIn("contracts", names)
+        self.assertEqual(names, ws.cube_names())
+
+        # Importing a model invalidates the cached list
+        ws.import_model(self.model_path("other.json"), namespace="other")
+        self.assertIn("other.other", ws.cube_names())
+
+    def test_list_cubes_authorization_cache(self):
+        ws = Workspace()
+        ws.import_model(self.model_path("model.json"))
+        ws.import_model(self.model_path("other.json"), namespace="other")
+        ws.authorizer = CountingAuthorizer(["contracts"])
+
+        self.assertEqual(["contracts"], ws.cube_names("john"))
+        self.assertEqual(["contracts"], ws.cube_names("john"))
+        self.assertEqual(1, ws.authorizer.calls)
+
+        # Authorized cubes are known from the list
+        ws.cube("contracts", identity="john")
+        self.assertEqual(1, ws.authorizer.calls)
+
+        with self.assertRaises(NotAuthorized):
+            ws.cube("other.other", identity="john")
+
+        ws.invalidate_auth("john")
+        ws.cube_names("john")
+        self.assertEqual(3, ws.authorizer.calls)
+
+        # Replacing the authorizer forgets the cached authorization
+        ws.authorizer = CountingAuthorizer(["other.other", "contracts"])
+        # The order of the authorizer is kept
+        self.assertEqual(["other.other", "contracts"], ws.cube_names("john"))
+        ws.cube("other.other", identity="john")
+        self.assertEqual(1, ws.authorizer.calls)
+
+    def test_authorization_cache_size(self):
+        config = ConfigParser()
+        config.add_section("workspace")
+        config.set("workspace", "cube_cache_size", "2")
+        ws = Workspace(config=config)
+        ws.import_model(self.model_path("model.json"))
+        ws.authorizer = CountingAuthorizer(["contracts"])
+
+        for identity in ["john", "ivana", "bob"]:
+            ws.cube_names(identity)
+
+        self.assertEqual(["ivana", "bob"], list(ws._auth_cache))
+
     def test_get_dimension(self):
         ws = self.default_workspace()
         dim = ws.dimension("date")